@@ -18,7 +18,7 @@ def init():
     Settings.setup()
     Logger.init(
         level=logging.INFO,
-        log_file=f"logs/app_{utils.iso_date_dd}.log",
+        log_file=f"logs/app_{utils.iso_date_dd()}.log",
         max_bytes=10_000_000,
         backup_count=5,
         console=True,
@@ -0,0 +1,47 @@
+"""ProcessManager 的使用示例，仅供手动演示，正常流程不会导入本模块。"""
+import time
+
+from tester.tester_adapter import ProcessManager
+
+
+def main():
+    # 创建进程管理器
+    process_manager = ProcessManager("xxxx.exe", "-f", "app.yaml")
+
+    # 启动进程并实时输出日志
+    if not process_manager.start():
+        print("启动失败")
+        return
+
+    try:
+        # 主线程可以继续工作
+        print("主线程正在工作...")
+
+        # 模拟工作
+        for i in range(10):
+            print(f"主线程工作状态: {i + 1}/10")
+            time.sleep(1)
+
+            # 检查进程状态
+            if not process_manager.is_running():
+                print("子进程已提前退出")
+                break
+
+        print("主线程工作完成")
+    finally:
+        # 确保停止进程
+        process_manager.stop()
+
+        # 获取并保存日志
+        logs = process_manager.get_logs()
+        with open("process_logs.txt", "w") as f:
+            f.write("=== STDOUT ===\\n")
+            f.write(logs.get("stdout", "") + "\\n\\n")
+            f.write("=== STDERR ===\\n")
+            f.write(logs.get("stderr", "") + "\\n")
+
+        print("日志已保存到 process_logs.txt")
+
+
+if __name__ == "__main__":
+    main()
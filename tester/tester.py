@@ -1,31 +1,137 @@
 import asyncio
+import collections
+import itertools
 import json
 import logging
-import random
-import shutil
+import os
 import socket
 import tempfile
+import threading
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 import aiohttp
-import requests
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选加速依赖，缺失时退回标准库 json
+    orjson = None
+
 from common import constants
 from common.constants import TEST_URLS, CONNECTION_TIMEOUT
 from config.settings import Settings
 from tester.tester_adapter import XrayOrV2RayTester
 
 
-def find_available_port(start: int = 10000, end: int = 60000) -> int:
-    while True:
-        port = random.randint(start, end)
+# 探测用的临时配置统一写入内存盘（Linux 为 /dev/shm，其他平台退回系统临时目录）；
+# 目录由各 tester 实例用 mkdtemp 独占创建，并发运行、多用户主机之间互不踩踏
+_CONFIG_DIR_BASE = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+
+def _dump_config_bytes(config: Dict[str, Any]) -> bytes:
+    """将配置序列化为 bytes，优先使用 orjson（C 实现，单次输出）。"""
+    if orjson is not None:
+        return orjson.dumps(config)
+    return json.dumps(config).encode()
+
+
+async def _wait_socks_ready_async(port: int, timeout: float = 2.0) -> bool:
+    """异步版本的 SOCKS 入站端口就绪轮询。"""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if await _tcp_alive_async('127.0.0.1', port, timeout=0.1):
+            return True
+        await asyncio.sleep(0.01)
+    return False
+
+
+async def _tcp_alive_async(server: Any, port: Any, timeout: float = 0.5) -> bool:
+    """异步 TCP 连通性检查，server:port 在超时内能完成三次握手即视为存活。
+
+    直接在事件循环的 selector 上多路复用裸的非阻塞 socket（sock_connect），
+    不走 open_connection，省去每次预检分配 transport/StreamReader 的开销。
+    """
+    if not server or not port:
+        return False
+    loop = asyncio.get_running_loop()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setblocking(False)
+    try:
+        await asyncio.wait_for(loop.sock_connect(sock, (server, int(port))), timeout)
+        return True
+    except (OSError, asyncio.TimeoutError, ValueError):
+        return False
+    finally:
+        sock.close()
+
+
+# 预分配的本地端口环：让内核通过 bind(0) 直接给出空闲端口，
+# 免去随机撞端口的重试循环，也避免多路探测分到同一个端口
+_PORT_RING: collections.deque = collections.deque()
+_PORT_RING_REFILL = 64
+_port_ring_lock = threading.Lock()
+
+
+def _refill_port_ring(count: int = _PORT_RING_REFILL) -> None:
+    for _ in range(count):
         with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-            try:
-                sock.bind(('127.0.0.1', port))
-                return port
-            except OSError:
-                continue
+            sock.bind(('127.0.0.1', 0))
+            _PORT_RING.append(sock.getsockname()[1])
+
+
+def find_available_port() -> int:
+    """从预分配端口环取一个空闲本地端口，环空时批量补充。"""
+    with _port_ring_lock:
+        if not _PORT_RING:
+            _refill_port_ring()
+        return _PORT_RING.popleft()
+
+
+# outbound 只由节点自身属性决定，与本地端口无关；重测同一节点时直接复用缓存结果
+_OUTBOUND_SIG_KEYS = (
+    'type', 'server', 'port', 'uuid', 'password', 'network', 'tls', 'sni',
+    'path', 'host', 'cipher', 'flow', 'headerType', 'alterId', 'username',
+    'allowInsecure', 'multiMode', 'quicSecurity', 'quicKey'
+)
+_OUTBOUND_CACHE_MAX = 8192
+
+# 每完成多少个节点输出一次进度汇总，避免成千上万条逐节点日志拖慢完成回调
+_PROGRESS_LOG_EVERY = 50
+
+# 节点延迟的接受上限（毫秒），超过即视为无效；探测预算也以此为上界，
+# 注定落选的节点不必等满 CONNECTION_TIMEOUT
+MAX_ACCEPTED_LATENCY_MS = 1000
+
+_outbound_cache: Dict[tuple, Dict[str, Any]] = {}
+
+
+def _node_signature(node: Dict[str, Any]) -> tuple:
+    """提取节点的可哈希签名，作为 outbound 缓存的键。"""
+    return tuple(node.get(k) for k in _OUTBOUND_SIG_KEYS)
+
+
+# 序列化后的配置模板缓存：入站端口是唯一逐次变化的字段，先用占位端口
+# 序列化一次，之后每次探测只做一次 bytes.replace，不再经过 JSON 编码。
+# 占位端口超出合法端口范围，不可能与节点真实端口冲突；字符串里出现同样
+# 文本时引号会被转义，字节形式不同，替换是安全的
+_PORT_PLACEHOLDER = 99999
+_PORT_TOKEN = b'"port":99999' if orjson is not None else b'"port": 99999'
+_PORT_FORMAT = b'"port":%d' if orjson is not None else b'"port": %d'
+_config_bytes_cache: Dict[tuple, bytes] = {}
+
+
+def _config_bytes_for(node: Dict[str, Any], local_port: int) -> Optional[bytes]:
+    """返回节点配置的序列化字节，端口由模板占位符替换得到。"""
+    sig = _node_signature(node)
+    template = _config_bytes_cache.get(sig)
+    if template is None:
+        config = generate_v2ray_config(node, _PORT_PLACEHOLDER)
+        if not config:
+            return None
+        template = _dump_config_bytes(config)
+        if len(_config_bytes_cache) < _OUTBOUND_CACHE_MAX:
+            _config_bytes_cache[sig] = template
+    return template.replace(_PORT_TOKEN, _PORT_FORMAT % local_port)
 
 
 def generate_v2ray_config(node: Dict[str, Any], local_port: int) -> Optional[Dict[str, Any]]:
@@ -41,20 +147,16 @@ def generate_v2ray_config(node: Dict[str, Any], local_port: int) -> Optional[Dic
         "log": {"loglevel": "none"}
     }
 
-    builders = {
-        'vmess': _build_vmess,
-        'trojan': _build_trojan,
-        'vless': _build_vless,
-        'ss': _build_shadowsocks,
-        'socks': _build_socks,
-        'http': _build_http,
-        'https': _build_http
-    }
-    builder = builders.get(node['type'])
-    if not builder:
-        logging.debug(f"警告: 不支持的协议 {node['type']}")
-        return None
-    outbound = builder(node)
+    sig = _node_signature(node)
+    outbound = _outbound_cache.get(sig)
+    if outbound is None:
+        builder = _OUTBOUND_BUILDERS.get(node['type'])
+        if not builder:
+            logging.debug(f"警告: 不支持的协议 {node['type']}")
+            return None
+        outbound = builder(node)
+        if outbound and len(_outbound_cache) < _OUTBOUND_CACHE_MAX:
+            _outbound_cache[sig] = outbound
     if outbound:
         base['outbounds'] = [outbound]
     return base
@@ -155,125 +257,126 @@ def _build_http(node: Dict[str, Any]) -> Dict[str, Any]:
     return {"protocol": "http", "settings": {"servers": servers}}
 
 
-class Tester:
-    def __init__(self, xray_process: Optional[XrayOrV2RayTester] = None) -> None:
-        self.xray_process = xray_process
+# 协议 → outbound 构造器的分发表，模块加载时建好，避免每次生成配置都重建
+_OUTBOUND_BUILDERS = {
+    'vmess': _build_vmess,
+    'trojan': _build_trojan,
+    'vless': _build_vless,
+    'ss': _build_shadowsocks,
+    'socks': _build_socks,
+    'http': _build_http,
+    'https': _build_http
+}
 
-    def test_all_nodes_latency(
-            self,
-            nodes: List[Dict[str, Any]],
-            max_workers: Optional[int] = None
-    ) -> List[Dict[str, Any]]:
-        max_workers = max_workers or Settings.THREAD_POOL_SIZE
-        total = len(nodes)
-        valid_nodes: List[Dict[str, Any]] = []
-        logging.info(
-            f"开始测试节点延迟，总共 {total} 个节点，使用线程池最大并发数：{max_workers}"
-        )
 
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = {executor.submit(self._process_node, node): node for node in nodes}
-            for idx, future in enumerate(as_completed(futures), 1):
-                node = futures[future]
-                nid = f"{node.get('server')}:{node.get('port', 'N/A')}" or f"index#{idx}"
-                try:
-                    result = future.result()
-                    if result:
-                        logging.info(f"[{idx}/{total}] ✓ 节点 {nid} 测试通过，延迟：{result['latency']} ms")
-                        valid_nodes.append(result)
-                    else:
-                        logging.info(f"[{idx}/{total}] ✗ 节点 {nid} 无效，已跳过")
-                except Exception as exc:
-                    logging.warning(f"[{idx}/{total}] ⚠ 节点 {nid} 测试异常：{exc!r}")
-
-        logging.info(
-            f"测试完成：共处理 {total} 个节点，其中 {len(valid_nodes)} 个有效，"
-            f"{total - len(valid_nodes)} 个无效/失败"
-        )
-        return valid_nodes
-
-    def _process_node(self, node: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        if not node.get('name') or not node.get('server'):
-            return None
-        latency = self._measure_latency(node)
-        if 0 <= latency <= 1000:
-            node['latency'] = latency
-            node['name'] = f"{node['name']} [{latency}ms]"
-            return node
-        return None
-
-    def _measure_latency(self, node: Dict[str, Any]) -> int:
-        temp_dir = Path(tempfile.mkdtemp(prefix="node_test_"))
-        config_path = temp_dir / "config.json"
-        port = find_available_port()
-        config = generate_v2ray_config(node, port)
-        if not config:
-            return -1
-        config_path.write_text(json.dumps(config))
-        proc = self.xray_process.start_adapter(str(config_path))
-        try:
-            if proc.poll() is not None:
-                logging.error(f"无法启动核心进程，检查配置：{config_path}")
-                return -1
-            proxies = {
-                'http': f'socks5://127.0.0.1:{port}',
-                'https': f'socks5://127.0.0.1:{port}'
-            }
-            start = time.perf_counter()
-            for url in TEST_URLS:
-                try:
-                    resp = requests.get(
-                        url, proxies=proxies,
-                        headers=constants.HEADERS,
-                        timeout=CONNECTION_TIMEOUT
-                    )
-                    if resp.status_code in (200, 204):
-                        return int((time.perf_counter() - start) * 1000)
-                except requests.RequestException:
-                    continue
-            return -1
-        finally:
-            try:
-                proc.terminate()
-                proc.wait(timeout=5)
-            except Exception:
-                proc.kill()
-            shutil.rmtree(temp_dir)
+def _group_duplicate_nodes(nodes: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """按 (server, port, type, 凭据) 分组；同一实际出口的重复节点只需探测一次。"""
+    groups: Dict[tuple, List[Dict[str, Any]]] = {}
+    for node in nodes:
+        key = (node.get('server'), node.get('port'), node.get('type'),
+               node.get('uuid') or node.get('password'))
+        groups.setdefault(key, []).append(node)
+    return list(groups.values())
 
 
 class AsyncTester:
-    def __init__(self, xray_process: Optional[XrayOrV2RayTester] = None) -> None:
+    def __init__(
+            self,
+            xray_process: Optional[XrayOrV2RayTester] = None,
+            race_margin_ms: Optional[int] = None
+    ) -> None:
         self.xray_process = xray_process
+        # 本实例独占的配置目录 + 自增计数器命名，
+        # 省去每次探测建目录/删目录的文件系统开销
+        self._config_dir = Path(tempfile.mkdtemp(prefix="node_test_", dir=_CONFIG_DIR_BASE))
+        self._config_counter = itertools.count()
+        # 所有探测共享同一个 ClientSession，免去每次探测重建连接池/DNS 缓存的开销
+        self._session: Optional[aiohttp.ClientSession] = None
+        # 竞速模式（只关心最快的节点时）：比当前最优再慢 race_margin_ms 的探测直接放弃
+        self._race_margin_ms = race_margin_ms
+        self._best_latency = float('inf')
+
+    def _next_config_path(self) -> Path:
+        """返回下一个探测配置文件路径（不创建文件）。"""
+        return self._config_dir / f"c{next(self._config_counter)}.json"
+
+    def _probe_cutoff_ms(self) -> float:
+        """返回当前探测的放弃阈值（毫秒），超过该延迟的节点不可能入选。"""
+        if self._race_margin_ms is None:
+            return float(MAX_ACCEPTED_LATENCY_MS)
+        return min(float(MAX_ACCEPTED_LATENCY_MS),
+                   self._best_latency + self._race_margin_ms)
 
     async def test_all_nodes_latency(
             self,
             nodes: List[Dict[str, Any]],
             max_workers: Optional[int] = None
     ) -> List[Dict[str, Any]]:
-        max_workers = max_workers or Settings.THREAD_POOL_SIZE
+        # 协程只占几 KB，远小于线程栈，默认并发可以放宽到 512
+        max_workers = max_workers or max(512, Settings.THREAD_POOL_SIZE)
         total = len(nodes)
         valid_nodes: List[Dict[str, Any]] = []
-        sem = asyncio.Semaphore(max_workers)
+        self._best_latency = float('inf')
 
         logging.info(
             f"开始测试节点延迟，总共 {total} 个节点，使用异步并发数：{max_workers}"
         )
 
-        async def sem_task(idx: int, node: Dict[str, Any]) -> None:
+        # 订阅列表常见大量同出口、仅名字不同的节点，按关键字段分组后只探测代表节点
+        groups = _group_duplicate_nodes(nodes)
+        group_total = len(groups)
+        if group_total < total:
+            logging.info(f"节点分组去重：{total} 个节点合并为 {group_total} 个探测目标")
+
+        # 阶段一：先做轻量的 TCP 连通预检，死节点不值得再起核心进程做完整 HTTP 探测
+        alive_reps = await self._prescan_alive_nodes([group[0] for group in groups])
+        alive_ids = {id(node) for node in alive_reps}
+        groups = [group for group in groups if id(group[0]) in alive_ids]
+        live_total = len(groups)
+        logging.info(f"TCP 预检完成：{live_total}/{group_total} 个探测目标端口可连通")
+
+        # 阶段二：对幸存节点做完整探测
+        sem = asyncio.Semaphore(max_workers)
+        debug_enabled = logging.getLogger().isEnabledFor(logging.DEBUG)
+        done = 0
+
+        async def sem_task(idx: int, group: List[Dict[str, Any]]) -> None:
+            nonlocal done
+            node = group[0]
             async with sem:
-                nid = f"{node.get('server')}:{node.get('port', 'N/A')}"
                 try:
                     result = await self._process_node(node)
                     if result:
-                        logging.info(f"[{idx}/{total}] ✓ 节点 {nid} 测试通过，延迟：{result['latency']} ms")
                         valid_nodes.append(result)
-                    else:
-                        logging.info(f"[{idx}/{total}] ✗ 节点 {nid} 无效，已跳过")
+                        # 同组的重复节点直接复用代表节点的测得延迟
+                        for dup in group[1:]:
+                            dup['latency'] = result['latency']
+                            dup['name'] = f"{dup['name']} [{result['latency']}ms]"
+                            valid_nodes.append(dup)
+                        if debug_enabled:
+                            logging.debug("[%d/%d] ✓ 节点 %s:%s 测试通过，延迟：%s ms",
+                                          idx, live_total, node.get('server'), node.get('port', 'N/A'),
+                                          result['latency'])
+                    elif debug_enabled:
+                        logging.debug("[%d/%d] ✗ 节点 %s:%s 无效，已跳过",
+                                      idx, live_total, node.get('server'), node.get('port', 'N/A'))
                 except Exception as exc:
-                    logging.warning(f"[{idx}/{total}] ⚠ 节点 {nid} 测试异常：{exc!r}")
-
-        tasks = [asyncio.create_task(sem_task(i + 1, node)) for i, node in enumerate(nodes)]
-        await asyncio.gather(*tasks)
+                    logging.warning("[%d/%d] ⚠ 节点 %s:%s 测试异常：%r",
+                                    idx, live_total, node.get('server'), node.get('port', 'N/A'), exc)
+                done += 1
+                if done % _PROGRESS_LOG_EVERY == 0 or done == live_total:
+                    logging.info(f"进度 {done}/{live_total}：已找到 {len(valid_nodes)} 个有效节点")
+
+        async with aiohttp.ClientSession(
+                headers=constants.HEADERS,
+                timeout=aiohttp.ClientTimeout(total=CONNECTION_TIMEOUT)
+        ) as session:
+            self._session = session
+            try:
+                tasks = [asyncio.create_task(sem_task(i + 1, group)) for i, group in enumerate(groups)]
+                await asyncio.gather(*tasks)
+            finally:
+                self._session = None
 
         logging.info(
             f"测试完成：共处理 {total} 个节点，其中 {len(valid_nodes)} 个有效，"
@@ -281,26 +384,38 @@ class AsyncTester:
         )
         return valid_nodes
 
+    async def _prescan_alive_nodes(self, nodes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """批量 TCP 连通预检，只保留端口可连通的节点。"""
+        if not nodes:
+            return []
+        sem = asyncio.Semaphore(min(len(nodes), 512))
+
+        async def check(node: Dict[str, Any]) -> bool:
+            async with sem:
+                return await _tcp_alive_async(node.get('server'), node.get('port'))
+
+        flags = await asyncio.gather(*(check(node) for node in nodes))
+        return [node for node, alive in zip(nodes, flags) if alive]
+
     async def _process_node(self, node: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         if not node.get('name') or not node.get('server'):
             return None
         latency = await self._measure_latency(node)
-        if 0 <= latency <= 1000:
+        if 0 <= latency <= MAX_ACCEPTED_LATENCY_MS:
             node['latency'] = latency
             node['name'] = f"{node['name']} [{latency}ms]"
             return node
         return None
 
     async def _measure_latency(self, node: Dict[str, Any]) -> int:
-        temp_dir = Path(tempfile.mkdtemp(prefix="node_test_"))
+        config_path = self._next_config_path()
         proc = None
         try:
-            config_path = temp_dir / "config.json"
             port = find_available_port()
-            config = generate_v2ray_config(node, port)
-            if not config:
+            config_bytes = _config_bytes_for(node, port)
+            if not config_bytes:
                 return -1
-            config_path.write_text(json.dumps(config))
+            config_path.write_bytes(config_bytes)
 
             # 启动 xray/v2ray 核心进程
             loop = asyncio.get_running_loop()
@@ -311,25 +426,36 @@ class AsyncTester:
             if proc.poll() is not None:
                 logging.error(f"无法启动核心进程，检查配置：{config_path}")
                 return -1
+            # 主动轮询 SOCKS 端口就绪，避免固定等待或探测竞争核心进程启动
+            if not await _wait_socks_ready_async(port):
+                logging.debug("SOCKS 端口 %s 在超时内未就绪", port)
+                return -1
 
             proxies = {
                 'http': f'socks5://127.0.0.1:{port}',
                 'https': f'socks5://127.0.0.1:{port}'
             }
 
+            session = self._session
             start = time.perf_counter()
-            async with aiohttp.ClientSession(headers={"User-Agent": "Mozilla/5.0"}) as session:
-                for url in TEST_URLS:
-                    try:
-                        async with session.get(
-                                url,
-                                proxy=proxies['http'],
-                                timeout=CONNECTION_TIMEOUT
-                        ) as resp:
-                            if resp.status in (200, 204):
-                                return int((time.perf_counter() - start) * 1000)
-                    except Exception:
-                        continue
+            for url in TEST_URLS:
+                # 剩余预算超过放弃阈值就不再继续，也把单次请求的超时压到预算内
+                budget = self._probe_cutoff_ms() / 1000 - (time.perf_counter() - start)
+                if budget <= 0:
+                    return -1
+                try:
+                    async with session.get(
+                            url,
+                            proxy=proxies['http'],
+                            timeout=aiohttp.ClientTimeout(total=min(CONNECTION_TIMEOUT, budget))
+                    ) as resp:
+                        if resp.status in (200, 204):
+                            latency = int((time.perf_counter() - start) * 1000)
+                            if latency < self._best_latency:
+                                self._best_latency = latency
+                            return latency
+                except Exception:
+                    continue
             return -1
         finally:
             if proc:
@@ -338,4 +464,15 @@ class AsyncTester:
                     proc.wait(timeout=5)
                 except Exception:
                     proc.kill()
-            shutil.rmtree(temp_dir)
\ No newline at end of file
+            config_path.unlink(missing_ok=True)
+
+
+class Tester(AsyncTester):
+    """同步门面：对外保持同步接口，内部统一复用 AsyncTester 的事件循环实现。"""
+
+    def test_all_nodes_latency(
+            self,
+            nodes: List[Dict[str, Any]],
+            max_workers: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        return asyncio.run(super().test_all_nodes_latency(nodes, max_workers))
@@ -1,14 +1,18 @@
-import io
+import hashlib
+import json
 import logging
 import os
 import platform
-import time
+import selectors
+import shutil
+import tempfile
 import unittest
 import zipfile
 from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from ssl import SSLError
 from subprocess import Popen
-import requests
 from requests import RequestException
 from common import constants
 from common.constants import GITHUB_PROXY, XRAY_API_URL
@@ -16,18 +20,219 @@ from utils.utils import make_session_with_retries
 import subprocess
 import sys
 import threading
-import time
-import os
 import signal
-import psutil
+
+# 平台检测在模块加载时算一次：platform.architecture() 在部分 POSIX
+# 系统上会派生子进程调用 file(1)，不适合每次调用都执行；
+# sys.maxsize 判断位宽是 CPython 推荐的零开销写法
+_IS_WINDOWS = platform.system() == "Windows"
+_IS_64BIT = sys.maxsize > 2 ** 32
+
+# 各核心 release 资源名里的平台关键字，随平台常量一并在导入时定死
+_XRAY_ASSET_KEYWORD = (("windows-64" if _IS_64BIT else "windows-32") if _IS_WINDOWS
+                       else ("linux-64" if _IS_64BIT else "linux-32"))
+_SUBS_ASSET_KEYWORD = (("Windows_x86_64" if _IS_64BIT else "Windows_x86") if _IS_WINDOWS
+                       else ("Linux_x86_64" if _IS_64BIT else "Linux_x86"))
+
+# 安装路径只取决于平台，模块加载时拼一次，调用时不再走 os.path.join 链
+_XRAY_INSTALL_PATH = os.path.join(
+    "xray-core", "windows-64" if _IS_WINDOWS else "linux-64",
+    "xray.exe" if _IS_WINDOWS else "xray"
+)
+_SUBS_INSTALL_PATH = os.path.join(
+    "subs-checker", "windows-64" if _IS_WINDOWS else "linux-64",
+    "subs-checker.exe" if _IS_WINDOWS else "subs-checker"
+)
+
+try:
+    import remotezip
+except ImportError:  # remotezip 为可选依赖，缺失时总是走完整下载
+    remotezip = None
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，缺失时退回标准库 json
+    orjson = None
+
+# json.loads 直接吃 bytes，跳过 response.json() 里 text 解码的中间字符串；
+# 有 orjson 时再快约 3 倍
+_json_loads = orjson.loads if orjson else json.loads
+
+# Windows 下隐藏子进程控制台窗口的启动参数，模块加载时构造一次即可，
+# 避免每次启动核心进程都重新分配 STARTUPINFO 对象
+_STARTUPINFO = None
+_CREATIONFLAGS = 0
+if sys.platform == "win32":
+    _STARTUPINFO = subprocess.STARTUPINFO()
+    _STARTUPINFO.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+    _STARTUPINFO.wShowWindow = subprocess.SW_HIDE
+    _CREATIONFLAGS = subprocess.CREATE_NO_WINDOW
+
+# 模块级共享 Session：get_download_url 与 install_adapter 复用同一连接池，
+# 免去每次调用重新 TCP+TLS 握手
+_SESSION = make_session_with_retries(total_retries=3, backoff_factor=1)
+
+# 进程内缓存 GitHub release 元数据：同一次运行里反复构造 tester 时
+# 不再重复请求 API，也避免触发未认证的 60 次/小时速率限制
+_release_info_cache: dict[str, dict] = {}
+
+# GitHub API 请求头：点名版本化的 JSON 媒体类型并显式接受 gzip，
+# release 清单在线上的体积约缩小到 1/5
+_API_HEADERS = {
+    "Accept": "application/vnd.github+json",
+    "Accept-Encoding": "gzip",
+    "User-Agent": "free-v2ray-installer",
+}
+
+# release 元数据的磁盘缓存：记录 ETag 做条件请求，304 响应既没有响应体
+# 也几乎不消耗未认证的速率配额
+_RELEASE_CACHE_FILE = os.path.join(
+    os.path.expanduser("~"), ".cache", "free-v2ray", "releases.json"
+)
+
+
+def _load_release_disk_cache() -> dict:
+    try:
+        with open(_RELEASE_CACHE_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_release_disk_cache(cache: dict) -> None:
+    try:
+        os.makedirs(os.path.dirname(_RELEASE_CACHE_FILE), exist_ok=True)
+        with open(_RELEASE_CACHE_FILE, "w") as f:
+            json.dump(cache, f)
+    except OSError:
+        # 缓存写不进去不影响主流程
+        pass
+
+# 单个安装包的体积上限：正常核心 zip 远小于此，防止异常镜像喂超大载荷
+_MAX_ARCHIVE_BYTES = 200 * 1024 * 1024
+
+# 本进程内已校验通过的安装路径：重复 install_adapter 只剩一次 isfile，
+# 不再反复 stat + 流式算 SHA-256
+_install_verified: set[str] = set()
+
+
+def _file_sha256(path: str) -> str:
+    """流式计算文件 SHA-256，1MiB 分块避免大文件整读进内存"""
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def _write_checksum(install_path: str) -> None:
+    """安装成功后写 .sha256 侧车文件，供后续运行校验缓存的完整性"""
+    with open(install_path + ".sha256", "w") as f:
+        f.write(_file_sha256(install_path))
+
+
+def _is_valid_install(install_path: str) -> bool:
+    """判断已安装的二进制是否可直接复用。
+
+    先用单次 os.stat 走存在性快路径；有 .sha256 侧车时顺带校验内容，
+    截断或损坏的旧安装会触发重新下载。没有侧车的旧版安装保持
+    “存在即可用”的原语义。
+    """
+    try:
+        os.stat(install_path)
+    except OSError:
+        return False
+    try:
+        with open(install_path + ".sha256") as f:
+            expected = f.read().strip()
+    except OSError:
+        return True
+    if _file_sha256(install_path) == expected:
+        return True
+    logging.warning(f"安装文件校验失败，将重新下载: {install_path}")
+    return False
+
+
+def _read_sidecar(path: str) -> str | None:
+    """读取侧车文件内容，不存在时返回 None"""
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _cached_tag(api_url: str) -> str | None:
+    """仅查进程内缓存的最新 release tag，绝不触发 HTTP 请求"""
+    info = _release_info_cache.get(api_url)
+    return info.get("tag_name") if info else None
+
+
+def _write_tag_sidecar(install_path: str, api_url: str) -> None:
+    """安装成功后记录对应的 release tag，供后续运行判断是否需要升级"""
+    tag = _cached_tag(api_url)
+    if tag:
+        with open(install_path + ".tag", "w") as f:
+            f.write(tag)
+
+
+def _order_urls_by_head(urls: list[str], timeout: int = 5) -> list[str]:
+    """并发 HEAD 探测各镜像，把最先成功响应的 URL 排到最前。
+
+    直连在墙内可能要等满超时才失败，先用轻量 HEAD 赛跑确定可用镜像，
+    下载就从赢家开始；全部探测失败时保持原顺序，退回顺序重试逻辑。
+    """
+    pool = ThreadPoolExecutor(max_workers=len(urls))
+    try:
+        future_map = {
+            pool.submit(_SESSION.head, url, timeout=timeout, allow_redirects=True): url
+            for url in urls
+        }
+        for future in as_completed(future_map):
+            try:
+                if future.result().ok:
+                    winner = future_map[future]
+                    return [winner] + [u for u in urls if u != winner]
+            except RequestException:
+                continue
+        return list(urls)
+    finally:
+        # 不等输家线程：赢家一出结果就放行，慢镜像的 HEAD 留给后台收尾
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _get_release_info(api_url: str, timeout: int = 30) -> dict:
+    """获取 release 元数据：进程内缓存 -> ETag 条件请求 -> 完整请求 逐级回退"""
+    cached = _release_info_cache.get(api_url)
+    if cached is not None:
+        return cached
+    disk_cache = _load_release_disk_cache()
+    entry = disk_cache.get(api_url)
+    headers = dict(_API_HEADERS)
+    if entry and entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    response = _SESSION.get(api_url, timeout=timeout, headers=headers)
+    if response.status_code == 304 and entry:
+        release_info = entry["info"]
+    else:
+        # 失败响应（如 403 限流）绝不能进缓存，否则毒化整个运行
+        response.raise_for_status()
+        release_info = _json_loads(response.content)
+        etag = response.headers.get("ETag")
+        if etag:
+            disk_cache[api_url] = {"etag": etag, "info": release_info}
+            _save_release_disk_cache(disk_cache)
+    _release_info_cache[api_url] = release_info
+    return release_info
 
 
 class ProcessManager:
-    def __init__(self, executable_path, *args):
+    def __init__(self, executable_path, *args, max_log_lines: int = 10_000):
         """
         进程管理器
         :param executable_path: 可执行文件路径
         :param args: 命令行参数
+        :param max_log_lines: 每条流保留的日志行数上限，超出自动淘汰最旧行
         """
         self.executable_path = executable_path
         self.args = list(args)
@@ -35,16 +240,13 @@ class ProcessManager:
         self.pid = None
         self.stdout_thread = None
         self.stderr_thread = None
-        self.stdout_lines = []
-        self.stderr_lines = []
+        # 有界环形缓冲：长跑的子进程刷日志不会让内存无限增长
+        self.stdout_lines = deque(maxlen=max_log_lines)
+        self.stderr_lines = deque(maxlen=max_log_lines)
         self.running = False
+        # 子进程日志走 logging：懒 %-格式化，调高日志级别即可零成本关掉逐行输出
+        self._log = logging.getLogger(f"proc.{os.path.basename(executable_path)}")
 
-        # Windows特定配置
-        self.startupinfo = None
-        if sys.platform == "win32":
-            self.startupinfo = subprocess.STARTUPINFO()
-            self.startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-            self.startupinfo.wShowWindow = subprocess.SW_HIDE
 
     def start(self) -> bool:
         """启动进程并实时输出日志"""
@@ -54,34 +256,42 @@ class ProcessManager:
 
         try:
             # 创建进程
+            # POSIX 上放入新进程组，结束时一次 killpg 即可带走整棵进程树；
+            # 同时不扫描关闭 FD 表，满足 CPython posix_spawn 快速路径的条件
             self.process = subprocess.Popen(
                 [self.executable_path] + self.args,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
-                bufsize=1,  # 行缓冲
-                text=True,  # 文本模式
-                startupinfo=self.startupinfo
+                startupinfo=_STARTUPINFO,
+                start_new_session=(sys.platform != "win32"),
+                close_fds=(sys.platform == "win32")
             )
             self.pid = self.process.pid
             self.running = True
 
             print(f"进程已启动 (PID: {self.pid}): {self.executable_path} {' '.join(self.args)}")
 
-            # 启动线程实时输出日志
-            self.stdout_thread = threading.Thread(
-                target=self._read_stream,
-                args=(self.process.stdout, "STDOUT")
-            )
-            self.stderr_thread = threading.Thread(
-                target=self._read_stream,
-                args=(self.process.stderr, "STDERR")
-            )
-
-            self.stdout_thread.daemon = True
-            self.stderr_thread.daemon = True
-
-            self.stdout_thread.start()
-            self.stderr_thread.start()
+            if sys.platform == "win32":
+                # Windows 的 select 只支持套接字，管道仍走双线程逐行读取
+                self.stdout_thread = threading.Thread(
+                    target=self._read_stream,
+                    args=(self.process.stdout, "STDOUT"),
+                    daemon=True
+                )
+                self.stderr_thread = threading.Thread(
+                    target=self._read_stream,
+                    args=(self.process.stderr, "STDERR"),
+                    daemon=True
+                )
+                self.stdout_thread.start()
+                self.stderr_thread.start()
+            else:
+                # 单线程 selectors(epoll/kqueue) 多路复用两条管道，
+                # 64KiB 块读取后按行切分，省掉一个线程和逐行 readline 的开销
+                self.stdout_thread = threading.Thread(
+                    target=self._pump_streams, daemon=True
+                )
+                self.stdout_thread.start()
 
             return True
         except FileNotFoundError:
@@ -92,25 +302,59 @@ class ProcessManager:
             return False
 
     def _read_stream(self, stream, stream_name) -> None:
-        """从流中读取数据并实时输出"""
+        """从流中逐行读取数据并实时输出（Windows 回退路径）"""
+        lines = self.stdout_lines if stream_name == "STDOUT" else self.stderr_lines
         try:
-            for line in iter(stream.readline, ''):
-                if not line:
-                    break
-                line = line.rstrip()
-                # 实时输出到终端
-                print(f"[{stream_name} PID:{self.pid}] {line}")
-                # 保存日志
-                if stream_name == "STDOUT":
-                    self.stdout_lines.append(line)
-                else:
-                    self.stderr_lines.append(line)
+            for raw in iter(stream.readline, b''):
+                self._emit_line(raw, stream_name, lines)
         except ValueError:
             # 当流关闭时可能发生
             pass
         finally:
             stream.close()
 
+    def _pump_streams(self) -> None:
+        """单线程多路复用 stdout/stderr，块读取后按行切分"""
+        sel = selectors.DefaultSelector()
+        buffers = {}
+        for stream, name, lines in (
+                (self.process.stdout, "STDOUT", self.stdout_lines),
+                (self.process.stderr, "STDERR", self.stderr_lines),
+        ):
+            os.set_blocking(stream.fileno(), False)
+            sel.register(stream, selectors.EVENT_READ, (name, lines))
+            buffers[name] = b''
+        try:
+            while sel.get_map():
+                for key, _ in sel.select(timeout=0.1):
+                    name, lines = key.data
+                    raw = key.fileobj.read(65536)
+                    if raw is None:
+                        # 可读事件但暂无完整数据
+                        continue
+                    if not raw:
+                        # EOF：冲掉残余的半行并注销该流
+                        if buffers[name]:
+                            self._emit_line(buffers[name], name, lines)
+                            buffers[name] = b''
+                        sel.unregister(key.fileobj)
+                        key.fileobj.close()
+                        continue
+                    buffers[name] += raw
+                    *complete, buffers[name] = buffers[name].split(b'\n')
+                    for line in complete:
+                        self._emit_line(line, name, lines)
+        finally:
+            sel.close()
+
+    def _emit_line(self, raw: bytes, stream_name: str, lines: deque) -> None:
+        """解码一行子进程输出，实时记录并存入对应日志缓存"""
+        line = raw.decode(errors="replace").rstrip()
+        # 实时输出；参数延迟格式化，日志级别高于 INFO 时没有逐行开销
+        self._log.info("[%s PID:%s] %s", stream_name, self.pid, line)
+        # 保存日志
+        lines.append(line)
+
     def is_running(self) -> bool:
         """检查进程是否正在运行"""
         return self.running and self.process and (self.process.poll() is None)
@@ -136,13 +380,14 @@ class ProcessManager:
             else:
                 os.kill(self.pid, signal.SIGTERM)
 
-            # 等待结束
-            start_time = time.time()
-            while time.time() - start_time < timeout:
-                if not self.is_running():
-                    print("进程已终止")
-                    return True
-                time.sleep(0.1)
+            # 阻塞等待退出：waitpid 在进程结束瞬间返回，无需轮询
+            try:
+                self.process.wait(timeout=timeout)
+                self.running = False
+                print("进程已终止")
+                return True
+            except subprocess.TimeoutExpired:
+                pass
         except Exception as e:
             print(f"优雅终止失败: {str(e)}")
 
@@ -158,22 +403,18 @@ class ProcessManager:
     def _force_kill(self) -> None:
         """强制终止进程树"""
         try:
-            parent = psutil.Process(self.pid)
-            children = parent.children(recursive=True)
-
-            # 终止子进程
-            for child in children:
-                try:
-                    child.kill()
-                except psutil.NoSuchProcess:
-                    pass
-
-            # 终止父进程
-            parent.kill()
-
-            # 等待结束
-            parent.wait(timeout=2)
-        except psutil.NoSuchProcess:
+            if sys.platform == "win32":
+                # /T 递归结束整棵进程树，等价于 POSIX 的进程组 kill
+                subprocess.run(
+                    ["taskkill", "/T", "/F", "/PID", str(self.pid)],
+                    check=False, capture_output=True
+                )
+            else:
+                # start() 已将子进程放入独立进程组，一次系统调用带走全树，
+                # 无需再遍历 /proc 枚举子进程
+                os.killpg(os.getpgid(self.pid), signal.SIGKILL)
+            self.process.wait(timeout=2)
+        except ProcessLookupError:
             pass
         except Exception:
             # 回退
@@ -187,13 +428,13 @@ class ProcessManager:
         result = {}
 
         if stream in ("both", "stdout"):
-            lines = self.stdout_lines
+            lines = list(self.stdout_lines)
             if max_lines and len(lines) > max_lines:
                 lines = lines[-max_lines:]
             result["stdout"] = "\\n".join(lines)
 
         if stream in ("both", "stderr"):
-            lines = self.stderr_lines
+            lines = list(self.stderr_lines)
             if max_lines and len(lines) > max_lines:
                 lines = lines[-max_lines:]
             result["stderr"] = "\\n".join(lines)
@@ -206,47 +447,144 @@ class ProcessManager:
             self.stop()
 
 
-def main():
-    # 创建进程管理器
-    process_manager = ProcessManager("xxxx.exe", "-f", "app.yaml")
+def _install_core(display_name: str, install_path: str, api_url: str,
+                  get_download_url, members: set, timeout: int = 10) -> str:
+    """两个 tester 共用的下载安装流程。
 
-    # 启动进程并实时输出日志
-    if not process_manager.start():
-        print("启动失败")
+    依次走：进程内备忘录 -> 本地校验和/版本 tag 快路径 -> 镜像 HEAD 竞速 ->
+    Range 选择性解压（失败退回完整流式下载），成功后写侧车并记入备忘录。
+    """
+    install_dir = os.path.dirname(install_path)
+    # 本进程内已验证过的安装，isfile 一次就放行
+    if install_path in _install_verified and os.path.isfile(install_path):
+        return install_path
+    # 先查本地缓存再谈下载：二进制有效且版本不落后于已知的最新 tag 时，
+    # 热路径一个 HTTP 请求都不发
+    if _is_valid_install(install_path):
+        latest_tag = _cached_tag(api_url)
+        if latest_tag is None or _read_sidecar(install_path + ".tag") == latest_tag:
+            logging.info(f"{display_name} 已存在于：{install_path}")
+            _install_verified.add(install_path)
+            return install_path
+    release_url = get_download_url()
+    if not release_url:
+        raise RuntimeError(f"无法获取 {display_name} 核心程序的下载链接，请检查网络或更换镜像。")
+    urls_to_try = _order_urls_by_head([
+        f"{release_url}",  # 直连
+        f"{GITHUB_PROXY}/{release_url}",  # 代理方式
+    ])
+
+    for url in urls_to_try:
+        try:
+            logging.info(f"尝试下载 {display_name}: {url}")
+            os.makedirs(install_dir, exist_ok=True)
+            # 优先用 Range 请求只取所需成员，失败再退回完整流式下载：
+            # 下载到 8MiB 阈值的临时文件，整包不驻留内存，下载与落盘可重叠
+            if not _try_remote_extract(url, install_dir, members):
+                with _SESSION.get(url, stream=True, timeout=timeout) as resp:
+                    resp.raise_for_status()
+                    # 消费响应体前先看 Content-Length，超限镜像直接淘汰
+                    size = int(resp.headers.get("Content-Length", 0))
+                    if size > _MAX_ARCHIVE_BYTES:
+                        raise RequestException(f"安装包过大({size} 字节)，已放弃该镜像")
+                    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as spool:
+                        # 1MiB 分块：几十 MB 的包少走几百次 Python 循环
+                        for chunk in resp.iter_content(1 << 20):
+                            spool.write(chunk)
+                        spool.seek(0)
+                        with zipfile.ZipFile(spool) as z:
+                            _extract_zip(z, install_dir, members=members)
+            # 允许清单一个成员都没命中（如发布包改了布局）时按下载失败处理，
+            # 走镜像循环收尾的 RuntimeError，而不是带着缺失的二进制继续
+            if not os.path.isfile(install_path):
+                raise RequestException(
+                    f"安装包中未找到 {os.path.basename(install_path)}，可能发布包布局已变化"
+                )
+            logging.info(f"已解压到：{install_dir}")
+            # 设置执行权限（Linux）
+            if not _IS_WINDOWS:
+                os.chmod(install_path, 0o755)
+            _write_checksum(install_path)
+            _write_tag_sidecar(install_path, api_url)
+            _install_verified.add(install_path)
+            return install_path
+
+        except SSLError as ssl_err:
+            logging.warning(f"SSL 验证失败: {ssl_err}，尝试跳过验证重试")
+        except RequestException as req_err:
+            logging.warning(f"下载失败({url}): {req_err}")
+
+    # 全部方式失败
+    raise RuntimeError("所有下载方式均失败，请检查网络或更换镜像。")
+
+
+def _drop_page_cache(path: str) -> None:
+    """提示内核释放该文件的页缓存。
+
+    解压产物写完后只在 exec 时才会再被读到，没必要挤占页缓存；
+    Linux 之外或失败时静默跳过。
+    """
+    if not hasattr(os, "posix_fadvise"):
         return
-
     try:
-        # 主线程可以继续工作
-        print("主线程正在工作...")
-
-        # 模拟工作
-        for i in range(10):
-            print(f"主线程工作状态: {i + 1}/10")
-            time.sleep(1)
-
-            # 检查进程状态
-            if not process_manager.is_running():
-                print("子进程已提前退出")
-                break
-
-        print("主线程工作完成")
-    finally:
-        # 确保停止进程
-        process_manager.stop()
-
-        # 获取并保存日志
-        logs = process_manager.get_logs()
-        with open("process_logs.txt", "w") as f:
-            f.write("=== STDOUT ===\\n")
-            f.write(logs.get("stdout", "") + "\\n\\n")
-            f.write("=== STDERR ===\\n")
-            f.write(logs.get("stderr", "") + "\\n")
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+    except OSError:
+        pass
 
-        print("日志已保存到 process_logs.txt")
 
+def _extract_zip(z: zipfile.ZipFile, install_dir: str, members: set | None = None) -> None:
+    """逐成员流式解压：1MiB 缓冲拷贝，大文件不会在内存中完整展开。
 
-if __name__ == "__main__":
-    main()
+    members 给定时只解压文件名（basename）匹配的成员，跳过 geodata、
+    文档等与运行无关的内容。
+    """
+    # 已建目录集合：同目录多个成员只付一次 makedirs 系统调用
+    made_dirs: set[str] = set()
+    for info in z.infolist():
+        if members is not None and os.path.basename(info.filename) not in members:
+            continue
+        dst = os.path.join(install_dir, info.filename)
+        if info.is_dir():
+            target_dir = dst
+        else:
+            target_dir = os.path.dirname(dst) or '.'
+        if target_dir not in made_dirs:
+            os.makedirs(target_dir, exist_ok=True)
+            made_dirs.add(target_dir)
+        if info.is_dir():
+            continue
+        # 先写 .part 再原子替换，中途失败不会留下半个二进制
+        tmp_dst = dst + '.part'
+        with z.open(info) as src, open(tmp_dst, 'wb') as out:
+            shutil.copyfileobj(src, out, length=1 << 20)
+        os.replace(tmp_dst, dst)
+        _drop_page_cache(dst)
+
+
+def _try_remote_extract(url: str, install_dir: str, members: set) -> bool:
+    """通过 HTTP Range 请求只下载所需成员的压缩字节。
+
+    RemoteZip 借助 ZIP 中央目录定位成员，按需发起 Range GET；CDN 不支持
+    Range 或未安装 remotezip 时返回 False，由调用方退回完整下载。
+    """
+    if remotezip is None:
+        return False
+    try:
+        with remotezip.RemoteZip(url) as rz:
+            wanted = [info for info in rz.infolist()
+                      if os.path.basename(info.filename) in members]
+            if not wanted:
+                return False
+            # RemoteZip 是 ZipFile 子类，直接复用流式解压
+            _extract_zip(rz, install_dir, members=members)
+            return True
+    except Exception as e:
+        logging.debug(f"Range 下载不可用({url}): {e}")
+        return False
 
 
 class TesterAdapter(ABC):
@@ -288,32 +626,24 @@ class XrayOrV2RayTester(TesterAdapter):
     主要功能包括获取最新版本的下载链接、下载并解压核心程序,以及启动xray进程。
     """
 
-    def __init__(self, install_path: str):
+    def __init__(self, install_path: str, extra_files: set | None = None):
         super().__init__(install_path)
+        # 除核心可执行文件外额外需要解压的成员（如 geoip.dat/geosite.dat）
+        self.extra_files = set(extra_files or ())
 
     def get_download_url(self) -> str | None:
         """获取Xray核心程序的下载链接"""
         try:
-            response = requests.get(XRAY_API_URL, timeout=30)
-            release_info = response.json()
+            release_info = _get_release_info(XRAY_API_URL)
 
-            # 检测操作系统类型
-            is_windows = platform.system() == "Windows"
-            is_64bit = platform.architecture()[0] == '64bit'
+            file_keyword = _XRAY_ASSET_KEYWORD
 
-            # 确定下载文件名
-            if is_windows:
-                file_keyword = "windows-64" if is_64bit else "windows-32"
-            else:  # Linux
-                file_keyword = "linux-64" if is_64bit else "linux-32"
-
-            # 查找最新版本的Xray发布信息匹配的下载URL
-            for asset in release_info['assets']:
-                if file_keyword in asset['name'].lower() and asset['name'].endswith('.zip'):
-                    return asset['browser_download_url']
-
-            logging.info(f"未找到适合当前平台({file_keyword})的Xray下载链接")
-            return None
+            # 查找最新版本的Xray发布信息匹配的下载URL，命中即短路返回
+            url = next((asset['browser_download_url'] for asset in release_info['assets']
+                        if file_keyword in asset['name'].lower() and asset['name'].endswith('.zip')), None)
+            if url is None:
+                logging.info(f"未找到适合当前平台({file_keyword})的Xray下载链接")
+            return url
 
         except Exception as e:
             logging.warning(f"获取Xray下载链接失败: {str(e)}")
@@ -323,52 +653,12 @@ class XrayOrV2RayTester(TesterAdapter):
         """
         下载并解压安装 Xray Core zip，返回解压后的安装目录路径。
         """
-        release_url = self.get_download_url()
-        if not release_url:
-            raise RuntimeError("无法获取 Xray 核心程序的下载链接，请检查网络或更换镜像。")
-        is_windows = platform.system() == "Windows"
-        install_dir = os.path.join("xray-core", "windows-64" if is_windows else "linux-64")
-        self.install_path = os.path.join(install_dir, "xray.exe" if is_windows else "xray")
-        if os.path.exists(self.install_path):
-            logging.info(f"Xray 已存在于：{self.install_path}")
-            return self.install_path
-        urls_to_try = [
-            f"{release_url}",  # 直连
-            f"{GITHUB_PROXY}/{release_url}",  # 代理方式
-        ]
-
-        session = make_session_with_retries(total_retries=3, backoff_factor=1)
-
-        for url in urls_to_try:
-            try:
-                logging.info(f"尝试下载 Xray: {url}")
-                resp = session.get(url, timeout=timeout)
-                resp.raise_for_status()
-
-                # 解压到指定目录
-
-                os.makedirs(install_dir, exist_ok=True)
-                # 解压缩文件
-                with zipfile.ZipFile(io.BytesIO(resp.content)) as z:
-                    z.extractall(install_dir)
-                logging.info(f"已解压到：{install_dir}")
-                # 设置执行权限（Linux）
-                if not is_windows:
-                    xray_path = os.path.join(install_dir, "xray")
-                    if os.path.exists(xray_path):
-                        os.chmod(xray_path, 0o755)
-                # 返回绝对路径
-                return self.install_path
-
-            except SSLError as ssl_err:
-                logging.warning(f"SSL 验证失败: {ssl_err}，尝试跳过验证重试")
-            except RequestException as req_err:
-                logging.warning(f"下载失败({url}): {req_err}")
-
-            time.sleep(2)
-
-        # 全部方式失败
-        raise RuntimeError("所有下载方式均失败，请检查网络或更换镜像。")
+        self.install_path = _XRAY_INSTALL_PATH
+        # 只解压核心可执行文件（及调用方点名的额外成员），
+        # geoip/geosite 等 geodata 往往占包一半以上
+        members = {"xray.exe", "xray"} | self.extra_files
+        return _install_core("Xray", self.install_path, XRAY_API_URL,
+                             self.get_download_url, members, timeout)
 
     def start_adapter(self, config_file: str) -> Popen | None:
         """
@@ -377,21 +667,17 @@ class XrayOrV2RayTester(TesterAdapter):
         super().start_adapter(config_file)
         if not self.install_path:
             raise RuntimeError("Xray 核心程序未安装，请先调用 download_xray_core 方法。")
-        # 使用 subprocess 启动进程
-        import subprocess
-        # 在Windows上，使用CREATE_NO_WINDOW标志隐藏控制台窗口
-        startupinfo = None
-        if platform.system() == "Windows":
-            startupinfo = subprocess.STARTUPINFO()
-            startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-            startupinfo.wShowWindow = subprocess.SW_HIDE
-
-        # 启动核心程序
+        # 启动核心程序；Windows 上用模块级缓存的启动参数隐藏控制台窗口。
+        # POSIX 下不扫描关闭 FD 表（且不设 preexec_fn），让 CPython 走
+        # posix_spawn 快速路径，单次 spawn 可便宜数毫秒
         core_process = subprocess.Popen(
             [self.install_path, "-c", config_file],
+            stdin=subprocess.DEVNULL,
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL,
-            startupinfo=startupinfo
+            startupinfo=_STARTUPINFO,
+            creationflags=_CREATIONFLAGS,
+            close_fds=(sys.platform == "win32")
         )
         if core_process.poll() is not None:
             raise RuntimeError("Xray 启动失败，可能是配置文件错误或核心程序未正确安装。")
@@ -422,26 +708,16 @@ class SubsCheckTester(TesterAdapter):
     def get_download_url(self) -> str | None:
         """获取SubChecker核心程序的下载链接"""
         try:
-            response = requests.get(constants.SUBS_CHECK_URL, timeout=30)
-            release_info = response.json()
+            release_info = _get_release_info(constants.SUBS_CHECK_URL)
 
-            # 检测操作系统类型
-            is_windows = platform.system() == "Windows"
-            is_64bit = platform.architecture()[0] == '64bit'
+            file_keyword = _SUBS_ASSET_KEYWORD
 
-            # 确定下载文件名
-            if is_windows:
-                file_keyword = "Windows_x86_64" if is_64bit else "Windows_x86"
-            else:  # Linux
-                file_keyword = "Linux_x86_64" if is_64bit else "Linux_x86"
-
-            # 查找最新版本的SubChecker发布信息匹配的下载URL
-            for asset in release_info['assets']:
-                if file_keyword in asset['name'] and asset['name'].endswith('.zip'):
-                    return asset['browser_download_url']
-
-            logging.info(f"未找到适合当前平台({file_keyword})的SubsCheck下载链接")
-            return None
+            # 查找最新版本的SubChecker发布信息匹配的下载URL，命中即短路返回
+            url = next((asset['browser_download_url'] for asset in release_info['assets']
+                        if file_keyword in asset['name'] and asset['name'].endswith('.zip')), None)
+            if url is None:
+                logging.info(f"未找到适合当前平台({file_keyword})的SubsCheck下载链接")
+            return url
 
         except Exception as e:
             logging.warning(f"获取SubChecker下载链接失败: {str(e)}")
@@ -451,51 +727,11 @@ class SubsCheckTester(TesterAdapter):
         """
         下载并解压安装 SubChecker zip，返回解压后的安装目录路径。
         """
-        release_url = self.get_download_url()
-        if not release_url:
-            raise RuntimeError("无法获取 Subs-Checker 核心程序的下载链接，请检查网络或更换镜像。")
-        is_windows = platform.system() == "Windows"
-        install_dir = os.path.join("subs-checker", "windows-64" if is_windows else "linux-64")
-        self.install_path = os.path.join(install_dir, "subs-checker.exe" if is_windows else "subs-checker")
-        if os.path.exists(self.install_path):
-            logging.info(f"SubChecker 已存在于：{self.install_path}")
-            return self.install_path
-        urls_to_try = [
-            f"{release_url}",  # 直连
-            f"{GITHUB_PROXY}/{release_url}",  # 代理方式
-        ]
-
-        session = make_session_with_retries(total_retries=3, backoff_factor=1)
-
-        for url in urls_to_try:
-            try:
-                logging.info(f"尝试下载 subs-checker: {url}")
-                resp = session.get(url, timeout=timeout)
-                resp.raise_for_status()
-
-                # 解压到指定目录
-                os.makedirs(install_dir, exist_ok=True)
-                # 解压缩文件
-                with zipfile.ZipFile(io.BytesIO(resp.content)) as z:
-                    z.extractall(install_dir)
-                logging.info(f"已解压到：{install_dir}")
-                # 设置执行权限（Linux）
-                if not is_windows:
-                    subs_check_path = os.path.join(install_dir, "subs-checker")
-                    if os.path.exists(subs_check_path):
-                        os.chmod(subs_check_path, 0o755)
-                # 返回绝对路径
-                return self.install_path
-
-            except SSLError as ssl_err:
-                logging.warning(f"SSL 验证失败: {ssl_err}，尝试跳过验证重试")
-            except RequestException as req_err:
-                logging.warning(f"下载失败({url}): {req_err}")
-
-            time.sleep(2)
-
-        # 全部方式失败
-        raise RuntimeError("所有下载方式均失败，请检查网络或更换镜像。")
+        self.install_path = _SUBS_INSTALL_PATH
+        # 只解压核心可执行文件，跳过文档等其他成员
+        members = {"subs-checker.exe", "subs-checker"}
+        return _install_core("SubChecker", self.install_path, constants.SUBS_CHECK_URL,
+                             self.get_download_url, members, timeout)
 
     def start_adapter(self, config_file: str) -> Popen | None:
         """
@@ -504,21 +740,16 @@ class SubsCheckTester(TesterAdapter):
         super().start_adapter(config_file)
         if not self.install_path:
             raise RuntimeError("SubChecker 核心程序未安装，请先调用 install_adapter 方法。")
-        # 使用 subprocess 启动进程
-        import subprocess
-        # 在Windows上，使用CREATE_NO_WINDOW标志隐藏控制台窗口
-        startupinfo = None
-        if platform.system() == "Windows":
-            startupinfo = subprocess.STARTUPINFO()
-            startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-            startupinfo.wShowWindow = subprocess.SW_HIDE
-
-        # 启动核心程序
+        # 启动核心程序；Windows 上用模块级缓存的启动参数隐藏控制台窗口。
+        # POSIX 下不扫描关闭 FD 表，让 CPython 走 posix_spawn 快速路径
         core_process = subprocess.Popen(
             [self.install_path, "-f", config_file],
+            stdin=subprocess.DEVNULL,
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL,
-            startupinfo=startupinfo
+            startupinfo=_STARTUPINFO,
+            creationflags=_CREATIONFLAGS,
+            close_fds=(sys.platform == "win32")
         )
         if core_process.poll() is not None:
             raise RuntimeError("SubChecker 启动失败，可能是配置文件错误或核心程序未正确安装。")
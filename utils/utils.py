@@ -1,4 +1,5 @@
 import base64
+import functools
 import logging
 import re
 from datetime import datetime
@@ -8,17 +9,33 @@ from urllib3 import Retry
 from config.settings import Settings
 from parser import node_to_v2ray_uri
 
-now = datetime.now()
+# 常见日期格式集中定义，取值时才执行 strftime：
+# 不拖慢导入，跨天运行的长进程也不会拿到进程启动时的过期日期
+_DATE_FORMATS = {
+    "iso": "%Y-%m-%d",  # 2025-06-17
+    "iso_dd": "%Y_%m_%d",  # 2025_06_17
+    "iso_ld": "%Y/%m/%d",  # 2025/06/17
+    "datetime": "%Y-%m-%d %H:%M:%S",  # 2025-06-17 10:23:45
+    "chinese": "%Y年%m月%d日",  # 2025年06月17日
+    "compact": "%y%m%d",  # 250617
+    "weekday": "%A",  # Tuesday
+}
+_WEEKDAYS_CN = ["星期一", "星期二", "星期三", "星期四", "星期五", "星期六", "星期日"]
 
-# 常见格式示例
-iso_date = now.strftime("%Y-%m-%d")  # 2025-06-17
-iso_date_dd = now.strftime("%Y_%m_%d")  # 2025_06_17
-iso_date_ld = now.strftime("%Y/%m/%d")  # 2025/06/17
-iso_datetime = now.strftime("%Y-%m-%d %H:%M:%S")  # 2025-06-17 10:23:45
-chinese_date = now.strftime("%Y年%m月%d日")  # 2025年06月17日
-compact = now.strftime("%y%m%d")  # 250617
-weekday = now.strftime("%A")  # Tuesday
-weekday_today = ["星期一", "星期二", "星期三", "星期四", "星期五", "星期六", "星期日"][datetime.now().weekday()]
+
+def fmt_now(key: str) -> str:
+    """按 _DATE_FORMATS 中的键格式化当前时间"""
+    return datetime.now().strftime(_DATE_FORMATS[key])
+
+
+def iso_date_dd() -> str:
+    """当前日期（下划线分隔），如 2025_06_17，用于日志文件名"""
+    return fmt_now("iso_dd")
+
+
+def weekday_today() -> str:
+    """今天对应的中文星期"""
+    return _WEEKDAYS_CN[datetime.now().weekday()]
 
 
 def save_results(nodes: list[dict], file_name) -> None:
@@ -26,25 +43,27 @@ def save_results(nodes: list[dict], file_name) -> None:
     if not nodes:
         logging.info("未找到有效节点，不生成文件")
         return
-    # 优化为海象运算符 只调用一次 node_to_v2ray_uri
-    uris = [uri for n in nodes if (uri := node_to_v2ray_uri(n))]
-    raw = "\n".join(uris)
-    b64 = base64.b64encode(raw.encode()).decode()
+    # bytes.join 吃生成器是 C 速度，且不再物化完整的 URI 列表：
+    # 大订阅合并时峰值内存只剩拼好的 bytes 本身。URI 里嵌有节点名
+    # （中文/emoji 常见），必须用 UTF-8 编码
+    raw_bytes = b"\n".join(
+        uri.encode()
+        for uri in map(node_to_v2ray_uri, nodes) if uri
+    )
+    count = raw_bytes.count(b"\n") + 1 if raw_bytes else 0
     v2ray_txt = Settings.V2RAY_DIR / file_name
-    v2ray_txt.write_text(b64, encoding="utf-8")
-    logging.info(f"已保存 {len(uris)} 条节点（base64）到 {v2ray_txt}")
+    v2ray_txt.write_bytes(base64.b64encode(raw_bytes))
+    logging.info(f"已保存 {count} 条节点（base64）到 {v2ray_txt}")
 
 
 def deduplicate_v2ray_nodes(nodes):
-    """根据节点唯一属性去重，例如用 server:port。"""
-    seen = set()
-    unique = []
+    """根据节点唯一属性去重，例如用 (server, port)。"""
+    # 元组键免去 f-string 的字符串拼接；setdefault 单遍完成去重并保留首见节点。
+    # 端口统一转 str：不同解析器给的 443 和 "443" 必须算同一个端点
+    seen = {}
     for node in nodes:
-        key = f"{node['server']}:{node['port']}"
-        if key and key not in seen:
-            seen.add(key)
-            unique.append(node)
-    return unique
+        seen.setdefault((node['server'], str(node['port'])), node)
+    return list(seen.values())
 
 
 def is_github_raw_url(url):
@@ -52,14 +71,38 @@ def is_github_raw_url(url):
     return 'raw.githubusercontent.com' in url
 
 
+# 订阅 URL 分类的热循环里逐条调用，模式在模块加载时编译一次
+_FILE_PATTERN_RE = re.compile(r'\{x}(\.[a-zA-Z0-9]+)(?:/|$)')
+
+
 def extract_file_pattern(url):
     """从URL中提取文件模式，例如{x}.yaml中的.yaml"""
-    match = re.search(r'\{x}(\.[a-zA-Z0-9]+)(?:/|$)', url)
+    match = _FILE_PATTERN_RE.search(url)
     if match:
         return match.group(1)  # 返回文件后缀，如 '.yaml', '.txt', '.json'
     return None
 
 
+# 允许重试的幂等方法：frozenset 免去 urllib3 每次请求的集合转换，
+# 也让镜像探测用的 HEAD 享受同样的重试策略
+_RETRY_ALLOWED_METHODS = frozenset({"GET", "HEAD"})
+
+
+@functools.lru_cache(maxsize=None)
+def _retry_policy(total_retries: int, backoff_factor: float, status_forcelist: tuple) -> Retry:
+    """按参数缓存 Retry 策略对象，可安全地被多个 Session 共享"""
+    return Retry(
+        total=total_retries,
+        backoff_factor=backoff_factor,
+        # 指数退避上加随机抖动并封顶，避免多 worker 重试节奏同步化
+        backoff_jitter=0.5,
+        backoff_max=30,
+        status_forcelist=status_forcelist,
+        allowed_methods=_RETRY_ALLOWED_METHODS,
+        raise_on_status=False,
+    )
+
+
 def make_session_with_retries(
         total_retries: int = 5,
         backoff_factor: float = 1.0,
@@ -67,14 +110,10 @@ def make_session_with_retries(
 ):
     """构造带 Retry 策略的 requests Session。"""
     session = requests.Session()
-    retries = Retry(
-        total=total_retries,
-        backoff_factor=backoff_factor,
-        status_forcelist=status_forcelist,
-        allowed_methods=["GET"],
-        raise_on_status=False,
-    )
-    adapter = HTTPAdapter(max_retries=retries)
+    retries = _retry_policy(total_retries, backoff_factor, status_forcelist)
+    # 连接池放大到 20：并发拉多个订阅/镜像时各 worker 复用同一池，
+    # 不会因默认 10 的上限互相挤掉 keep-alive 连接
+    adapter = HTTPAdapter(max_retries=retries, pool_connections=4, pool_maxsize=20)
     session.mount("https://", adapter)
     session.mount("http://", adapter)
     return session